@@ -4,13 +4,17 @@ import sys
 import os
 from datetime import date, timedelta
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.config import DEFAULT_TICKERS
+from src.console import log
 from src.database import create_db_tables, insert_ohlcv_data
-from src.fetchers import fetch_yfinance_data
+from src.fetchers import fetch_yfinance_batch
 from src.data_cleaner import clean_ohlcv_data
 
 # --- Configuration ---
@@ -21,68 +25,114 @@ TICKERS = DEFAULT_TICKERS
 DAYS_TO_FETCH = 10
 # For initial bulk load, set a much larger number or specific dates
 # DAYS_TO_FETCH = 365 * 5 # Example: 5 years
+# Number of tickers cleaned/stored concurrently (DB inserts are I/O-bound)
+MAX_WORKERS = 8
+# Large loads are cleaned and inserted in shards of this many rows to bound peak memory
+SHARD_ROWS = 10000
 
 # Determine date range
 END_DATE = date.today()
 START_DATE = END_DATE - timedelta(days=DAYS_TO_FETCH)
 
+
+def _clean_and_store(ticker, raw_df):
+    """
+    Cleans raw_df shard by shard and inserts each cleaned shard as soon as it is ready.
+
+    A consumer thread commits shard N while this thread cleans shard N+1, so at most
+    a couple of shards are resident at once.
+
+    Returns:
+        bool: True if at least one shard was stored and no insert failed.
+    """
+    shard_queue = queue.Queue(maxsize=2)
+    insert_results = []
+
+    def _consume():
+        while True:
+            shard = shard_queue.get()
+            if shard is None:
+                break
+            # Each call checks out its own pooled connection
+            insert_results.append(insert_ohlcv_data(shard))
+
+    consumer = threading.Thread(target=_consume, name=f"insert-{ticker}")
+    consumer.start()
+    try:
+        for start in range(0, len(raw_df), SHARD_ROWS):
+            cleaned_df = clean_ohlcv_data(raw_df.iloc[start:start + SHARD_ROWS], ticker=ticker)
+            if cleaned_df is not None and not cleaned_df.empty:
+                shard_queue.put(cleaned_df)
+    finally:
+        shard_queue.put(None) # Sentinel: no more shards
+        consumer.join()
+
+    return bool(insert_results) and all(insert_results)
+
+
+def _process_ticker(ticker, raw_df):
+    """
+    Cleans and stores already-fetched data for a single ticker. Runs in a worker thread.
+
+    Returns:
+        tuple: (ticker, success, elapsed_seconds)
+    """
+    ticker_start_time = time.time()
+    success = False
+    try:
+        if not raw_df.empty:
+            # Clean Data and Store it in the Database
+            success = _clean_and_store(ticker, raw_df)
+            if not success:
+                log(f"Data cleaning or storage failed for {ticker}.")
+        else:
+             log(f"Failed to fetch data for {ticker}.")
+
+    except Exception as e:
+        log(f"An unexpected error occurred processing {ticker}: {e}")
+        # Log the error trace here in a real application
+        # import traceback; traceback.print_exc();
+
+    return ticker, success, time.time() - ticker_start_time
+
+
 # --- Main Script ---
 if __name__ == "__main__":
-    print("--- Market Data Fetch and Store Script ---")
+    log("--- Market Data Fetch and Store Script ---")
     script_start_time = time.time()
 
     # 1. Setup Database Tables (Idempotent)
     if not create_db_tables():
-        print("Halting script due to database table setup failure.")
+        log("Halting script due to database table setup failure.")
         sys.exit(1) # Exit with error code
 
-    # 2. Loop Through Tickers and Process Data
-    print(f"\nFetching data for tickers: {TICKERS}")
-    print(f"Date range: {START_DATE} to {END_DATE}")
+    # 2. Process Tickers Concurrently
+    log(f"\nFetching data for tickers: {TICKERS}")
+    log(f"Date range: {START_DATE} to {END_DATE}")
 
     total_success = 0
     total_fail = 0
 
-    for ticker in TICKERS:
-        print(f"\n--- Processing: {ticker} ---")
-        ticker_start_time = time.time()
-        success = False
-        try:
-            # Fetch Raw Data (using yfinance for now)
-            raw_df = fetch_yfinance_data(ticker, start_date=START_DATE, end_date=END_DATE)
-
-            if not raw_df.empty:
-                # Clean Data
-                cleaned_df = clean_ohlcv_data(raw_df, ticker=ticker)
-
-                if cleaned_df is not None and not cleaned_df.empty:
-                    # Store Data in Database
-                    insert_ohlcv_data(cleaned_df)
-                    success = True
-                else:
-                    print(f"Data cleaning failed or resulted in empty data for {ticker}.")
-            else:
-                 print(f"Failed to fetch data for {ticker}.")
-
-        except Exception as e:
-            print(f"An unexpected error occurred processing {ticker}: {e}")
-            # Log the error trace here in a real application
-            # import traceback; traceback.print_exc();
+    # Fetch Raw Data for all tickers in batched requests (using yfinance for now)
+    raw_data = fetch_yfinance_batch(TICKERS, start_date=START_DATE, end_date=END_DATE)
 
-        ticker_end_time = time.time()
-        status = "SUCCESS" if success else "FAILED"
-        print(f"Finished processing {ticker} in {ticker_end_time - ticker_start_time:.2f}s [{status}]")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(_process_ticker, ticker, raw_data[ticker]): ticker for ticker in TICKERS}
+        for future in as_completed(futures):
+            ticker, success, elapsed = future.result()
+            status = "SUCCESS" if success else "FAILED"
+            log(f"Finished processing {ticker} in {elapsed:.2f}s [{status}]")
 
-        if success:
-            total_success += 1
-        else:
-            total_fail += 1
+            if success:
+                total_success += 1
+            else:
+                total_fail += 1
 
     # 3. Final Summary
     script_end_time = time.time()
-    print("\n--- Script Summary ---")
-    print(f"Processed {len(TICKERS)} tickers.")
-    print(f"Successful: {total_success}")
-    print(f"Failed:     {total_fail}")
-    print(f"Total execution time: {script_end_time - script_start_time:.2f} seconds.")
-    print("----------------------")
\ No newline at end of file
+    log("\n--- Script Summary ---")
+    log(f"Processed {len(TICKERS)} tickers.")
+    log(f"Successful: {total_success}")
+    log(f"Failed:     {total_fail}")
+    log(f"Total execution time: {script_end_time - script_start_time:.2f} seconds.")
+    log("----------------------")
\ No newline at end of file
@@ -12,9 +12,22 @@
 --     PRIMARY KEY (ticker, date) -- Composite primary key
 -- );
 
--- -- Optional: Indexes for performance
--- CREATE INDEX IF NOT EXISTS idx_ohlcv_ticker_date ON ohlcv_data (ticker, date);
--- CREATE INDEX IF NOT EXISTS idx_ohlcv_date ON ohlcv_data (date);
+-- -- Indexes for performance
+-- -- (ticker, date) lookups are served by the primary key btree; a separate index on them is redundant.
+-- -- BRIN suits date as rows arrive in roughly date order, and is far smaller than a btree.
+-- CREATE INDEX IF NOT EXISTS idx_ohlcv_date_brin ON ohlcv_data USING brin (date);
+
+-- -- Existing databases: drop the old redundant index (create_all does not remove it)
+-- DROP INDEX IF EXISTS idx_ohlcv_ticker_date;
+
+-- -- Optional for very large tables (>10M rows): partition by date range, one partition per year.
+-- -- Upserts then touch a single partition, and dropping an old year is a cheap DROP TABLE.
+-- CREATE TABLE IF NOT EXISTS ohlcv_data (
+--     ... same columns as above ...
+--     PRIMARY KEY (ticker, date)
+-- ) PARTITION BY RANGE (date);
+-- CREATE TABLE IF NOT EXISTS ohlcv_data_2024 PARTITION OF ohlcv_data
+--     FOR VALUES FROM ('2024-01-01') TO ('2025-01-01');
 
 -- -- Grant permissions if needed (replace 'your_user' with the actual user from .env)
 -- -- GRANT ALL PRIVILEGES ON TABLE ohlcv_data TO your_user;
\ No newline at end of file
@@ -18,6 +18,15 @@ if not DATABASE_URI:
 DEFAULT_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'SPY', 'BTC-USD']
 DEFAULT_SMA_WINDOW = 20 # Default window for Simple Moving Average
 
+# Database connection pool sizing (pool size should be >= concurrent worker threads)
+DB_POOL_SIZE = 16
+DB_MAX_OVERFLOW = 8
+# In-process memo of database reads; entries older than this are re-queried
+DB_READ_CACHE_TTL_SECONDS = 300
+
+# On-disk cache for raw yfinance downloads; entries older than the TTL are re-fetched
+FETCH_CACHE_TTL_HOURS = 6
+
 # Output directory for plots (relative to project root)
 PLOT_OUTPUT_DIR = "output_plots"
 
@@ -29,4 +38,7 @@ if not os.path.exists(abs_plot_output_dir):
         os.makedirs(abs_plot_output_dir)
         print(f"Created plot output directory: {abs_plot_output_dir}")
     except OSError as e:
-        print(f"Error creating directory {abs_plot_output_dir}: {e}")
\ No newline at end of file
+        print(f"Error creating directory {abs_plot_output_dir}: {e}")
+
+# Directory for cached raw fetches (created lazily on first write)
+FETCH_CACHE_DIR = os.path.join(project_root, "cache")
\ No newline at end of file
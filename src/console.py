@@ -0,0 +1,11 @@
+# src/console.py
+
+import threading
+
+# Shared by every thread so each message is written as one whole line
+_print_lock = threading.Lock()
+
+def log(message):
+    """Prints a message under a process-wide lock so output from worker threads does not interleave."""
+    with _print_lock:
+        print(message, flush=True)
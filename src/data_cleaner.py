@@ -3,6 +3,8 @@
 import pandas as pd
 import numpy as np
 
+from .console import log
+
 def clean_ohlcv_data(df, ticker="Unknown"):
     """
     Cleans and validates OHLCV data in a DataFrame.
@@ -17,96 +19,99 @@ def clean_ohlcv_data(df, ticker="Unknown"):
                       or None if input is invalid or cleaning results in empty data.
     """
     if df is None or df.empty:
-        print(f"Cleaner: No data provided for {ticker}.")
+        log(f"Cleaner: No data provided for {ticker}.")
         return None
 
-    print(f"Cleaner: Cleaning data for {ticker} ({len(df)} rows)...")
-    df_cleaned = df.copy()
+    log(f"Cleaner: Cleaning data for {ticker} ({len(df)} rows)...")
+    # The input frame is never mutated or copied: columns are read as numpy arrays,
+    # filtered with one mask and assembled into the output frame in a single step.
 
     required_cols = {'open', 'high', 'low', 'close', 'volume'}
-    if not required_cols.issubset(df_cleaned.columns):
-        missing = required_cols - set(df_cleaned.columns)
-        print(f"Cleaner Error: DataFrame for {ticker} is missing columns: {missing}")
+    if not required_cols.issubset(df.columns):
+        missing = required_cols - set(df.columns)
+        log(f"Cleaner Error: DataFrame for {ticker} is missing columns: {missing}")
         return None
 
-    # 1. Ensure Correct Index (needs to be DatetimeIndex for processing, then reset)
-    original_index_name = df_cleaned.index.name
-    if isinstance(df_cleaned.index, pd.DatetimeIndex):
-        df_cleaned['date'] = df_cleaned.index # Ensure date column exists if it was the index
-    elif 'date' in df_cleaned.columns:
-        df_cleaned['date'] = pd.to_datetime(df_cleaned['date'])
-        df_cleaned = df_cleaned.set_index('date', drop=False) # Keep date column, set index temporarily
+    # 1. Resolve the dates (from a DatetimeIndex, a 'date' column, or a date-like index)
+    if isinstance(df.index, pd.DatetimeIndex):
+        dates = df.index
+    elif 'date' in df.columns:
+        try:
+            dates = pd.DatetimeIndex(pd.to_datetime(df['date']))
+        except (TypeError, ValueError):
+            log(f"Cleaner Error: Could not parse the 'date' column for {ticker}.")
+            return None
     else: # Try to use original index if it looks like dates
         try:
-            df_cleaned.index = pd.to_datetime(df_cleaned.index)
-            df_cleaned['date'] = df_cleaned.index
-            print(f"Cleaner Info: Used original index as date for {ticker}.")
+            dates = pd.DatetimeIndex(pd.to_datetime(df.index))
+            log(f"Cleaner Info: Used original index as date for {ticker}.")
         except (TypeError, ValueError):
-             print(f"Cleaner Error: DataFrame for {ticker} needs a 'date' index or column.")
+             log(f"Cleaner Error: DataFrame for {ticker} needs a 'date' index or column.")
              return None
 
-    # Ensure index IS datetime index after potential setting
-    if not isinstance(df_cleaned.index, pd.DatetimeIndex):
-         # If setting index failed previously or wasn't datetime-like
-         print(f"Cleaner Error: Could not establish a valid DatetimeIndex for {ticker}.")
-         return None
+    # Keep the local calendar date; vectorized truncation avoids building Python date objects
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.normalize().to_numpy()
 
-
-    # 2. Convert columns to numeric, coercing errors
+    # 2. Convert OHLCV columns to float64 arrays, coercing errors
+    # Hot path: yfinance already returns float64 columns, which convert without copying
+    columns = {}
     for col in ['open', 'high', 'low', 'close', 'volume']:
-        df_cleaned[col] = pd.to_numeric(df_cleaned[col], errors='coerce')
-
-    # 3. Handle Missing Values (Drop rows with any NaN in OHLCV)
-    initial_rows = len(df_cleaned)
-    cols_to_check_na = ['open', 'high', 'low', 'close', 'volume']
-    df_cleaned.dropna(subset=cols_to_check_na, inplace=True)
-    rows_dropped = initial_rows - len(df_cleaned)
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            values = pd.to_numeric(values, errors='coerce')
+        columns[col] = values.to_numpy(dtype=np.float64)
+
+    # 3. Handle Missing Values (Drop rows with any NaN/inf in OHLCV) using a single mask
+    initial_rows = len(df)
+    valid_mask = np.ones(initial_rows, dtype=bool)
+    for values in columns.values():
+        valid_mask &= np.isfinite(values)
+    if not valid_mask.all():
+        dates = dates[valid_mask]
+        columns = {col: values[valid_mask] for col, values in columns.items()}
+    rows_dropped = initial_rows - len(dates)
     if rows_dropped > 0:
-        print(f"Cleaner: Dropped {rows_dropped} rows with NaN values in OHLCV for {ticker}.")
+        log(f"Cleaner: Dropped {rows_dropped} rows with NaN values in OHLCV for {ticker}.")
 
-    if df_cleaned.empty:
-        print(f"Cleaner: DataFrame for {ticker} became empty after dropping NaNs.")
+    if len(dates) == 0:
+        log(f"Cleaner: DataFrame for {ticker} became empty after dropping NaNs.")
         return None
 
     # 4. Basic Data Validation (Optional but recommended)
+    # Count via mask sums on the numpy arrays (no sub-DataFrames are materialized)
+    o, h, l, c, v = (columns[col] for col in ['open', 'high', 'low', 'close', 'volume'])
+
     # Check if High >= Low
-    invalid_hl = df_cleaned[df_cleaned['high'] < df_cleaned['low']]
-    if not invalid_hl.empty:
-        print(f"Cleaner Warning: Found {len(invalid_hl)} rows where High < Low for {ticker}. Keeping rows but check data source.")
-        # Consider dropping these rows: df_cleaned = df_cleaned[df_cleaned['high'] >= df_cleaned['low']]
+    invalid_hl = int((h < l).sum())
+    if invalid_hl:
+        log(f"Cleaner Warning: Found {invalid_hl} rows where High < Low for {ticker}. Keeping rows but check data source.")
 
     # Check if Close/Open are within High/Low bounds
-    invalid_c = df_cleaned[(df_cleaned['close'] > df_cleaned['high']) | (df_cleaned['close'] < df_cleaned['low'])]
-    invalid_o = df_cleaned[(df_cleaned['open'] > df_cleaned['high']) | (df_cleaned['open'] < df_cleaned['low'])]
-    if not invalid_c.empty or not invalid_o.empty:
-        print(f"Cleaner Warning: Found {len(invalid_c)} rows where Close outside H/L and {len(invalid_o)} where Open outside H/L for {ticker}. Check data source.")
+    invalid_c = int(((c > h) | (c < l)).sum())
+    invalid_o = int(((o > h) | (o < l)).sum())
+    if invalid_c or invalid_o:
+        log(f"Cleaner Warning: Found {invalid_c} rows where Close outside H/L and {invalid_o} where Open outside H/L for {ticker}. Check data source.")
 
     # Check for zero volume (might be valid, e.g., holidays, but good to note)
-    zero_vol = df_cleaned[df_cleaned['volume'] == 0]
-    if not zero_vol.empty:
-         print(f"Cleaner Info: Found {len(zero_vol)} rows with zero volume for {ticker}.")
+    zero_vol = int((v == 0).sum())
+    if zero_vol:
+         log(f"Cleaner Info: Found {zero_vol} rows with zero volume for {ticker}.")
 
     # Check for negative prices/volume (should not happen with adjusted data usually)
-    if (df_cleaned[['open', 'high', 'low', 'close', 'volume']] < 0).any().any():
-        print(f"Cleaner Warning: Found negative values in OHLCV data for {ticker}. Check data source.")
-        # Consider dropping: df_cleaned = df_cleaned[(df_cleaned[['open','high','low','close','volume']] >= 0).all(axis=1)]
-
-    print(f"Cleaner: Finished cleaning for {ticker}. Resulting rows: {len(df_cleaned)}")
-
-    # Prepare for DB insertion - ensure 'date' column has only date part, and 'ticker' exists
-    # Reset index to move date back to column if needed
-    if isinstance(df_cleaned.index, pd.DatetimeIndex):
-         df_cleaned.reset_index(inplace=True) # Moves 'date' from index to column
-
-    # Ensure 'date' column exists after reset and contains only date objects
-    if 'date' not in df_cleaned.columns:
-         print(f"Cleaner Error: 'date' column lost during processing for {ticker}.")
-         return None
-    df_cleaned['date'] = pd.to_datetime(df_cleaned['date']).dt.date # Ensure only date part
-
-    # Ensure 'ticker' column exists
-    df_cleaned['ticker'] = ticker
-
-    # Return dataframe with specific columns required for DB insertion
-    final_cols = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
-    return df_cleaned[final_cols]
\ No newline at end of file
+    if ((o < 0) | (h < 0) | (l < 0) | (c < 0) | (v < 0)).any():
+        log(f"Cleaner Warning: Found negative values in OHLCV data for {ticker}. Check data source.")
+
+    log(f"Cleaner: Finished cleaning for {ticker}. Resulting rows: {len(dates)}")
+
+    # Build the frame with the columns required for DB insertion in one shot
+    return pd.DataFrame({
+        'ticker': ticker,
+        'date': dates,
+        'open': o,
+        'high': h,
+        'low': l,
+        'close': c,
+        'volume': v,
+    })
@@ -1,19 +1,38 @@
 # src/database.py
 
-from sqlalchemy import create_engine, MetaData, Table, Column, String, Date, Numeric, PrimaryKeyConstraint, Index
+from sqlalchemy import create_engine, MetaData, Table, Column, String, Date, Numeric, PrimaryKeyConstraint, Index, select, cast
 from sqlalchemy.dialects.postgresql import insert as pg_insert # For ON CONFLICT DO UPDATE
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
 from sqlalchemy.exc import SQLAlchemyError
 import pandas as pd
+import numpy as np
+import io
+import time
+import functools
+import psycopg2
+import psycopg2.errors
 
-from .config import DATABASE_URI
+from .config import DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_READ_CACHE_TTL_SECONDS
+from .console import log
 
 # --- SQLAlchemy Setup ---
 try:
-    engine = create_engine(DATABASE_URI, echo=False) # Set echo=True for SQL logging
+    engine = create_engine(
+        DATABASE_URI,
+        pool_size=DB_POOL_SIZE, # Keep >= worker threads in run_fetch_and_store.py
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True, # Detect connections dropped while idle between Cron runs
+        pool_recycle=1800, # Recycle connections older than 30 minutes
+        # Let the psycopg2 dialect batch executemany() calls into multi-row statements
+        executemany_mode='values_plus_batch',
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500,
+        echo=False # Set echo=True for SQL logging
+    )
     metadata = MetaData()
-    print("Database engine created successfully.")
+    log("Database engine created successfully.")
 except Exception as e:
-    print(f"Error creating database engine: {e}")
+    log(f"Error creating database engine: {e}")
     engine = None
     metadata = None
 
@@ -28,26 +47,54 @@ ohlcv_table = Table(
     Column('close', Numeric(19, 8), nullable=True),
     Column('volume', Numeric(25, 4), nullable=True), # Using Numeric for potentially large volumes
     PrimaryKeyConstraint('ticker', 'date', name='ohlcv_data_pkey'),
-    Index('idx_ohlcv_ticker_date', 'ticker', 'date') # Index for efficient lookups
+    # The primary key already provides the (ticker, date) btree; BRIN serves cross-ticker date range scans
+    Index('idx_ohlcv_date_brin', 'date', postgresql_using='brin')
+)
+
+OHLCV_COLUMNS = [col.name for col in ohlcv_table.columns]
+_NUMERIC_COLUMNS = [col for col in OHLCV_COLUMNS if col not in ['ticker', 'date']]
+STAGE_TABLE_NAME = 'ohlcv_stage'
+
+# Raw SQL fragments for the psycopg2 COPY bulk upsert path
+_COLUMN_LIST = ', '.join(OHLCV_COLUMNS)
+_ON_CONFLICT_CLAUSE = (
+    "ON CONFLICT (ticker, date) DO UPDATE SET "
+    + ', '.join(f"{col} = EXCLUDED.{col}" for col in _NUMERIC_COLUMNS)
 )
 
+# Core upsert statement (PostgreSQL ON CONFLICT DO UPDATE), built once at import.
+# Rows are supplied as executemany parameters, so the same statement serves every call.
+_insert_stmt = pg_insert(ohlcv_table)
+_UPSERT_STMT = _insert_stmt.on_conflict_do_update(
+    index_elements=['ticker', 'date'], # Constraint name or columns
+    set_={col: _insert_stmt.excluded[col] for col in _NUMERIC_COLUMNS}
+)
+
+# Columns for reads: NUMERIC values are cast to DOUBLE PRECISION in the query, so the driver
+# returns plain floats instead of Decimal objects that pandas would convert one cell at a time.
+# The explicit dtypes keep all-NULL columns float64 as well.
+_READ_COLUMNS = [ohlcv_table.c.ticker, ohlcv_table.c.date] + [
+    cast(ohlcv_table.c[col], DOUBLE_PRECISION).label(col) for col in _NUMERIC_COLUMNS
+]
+_READ_DTYPES = {col: 'float64' for col in _NUMERIC_COLUMNS}
+
 # --- Database Functions ---
 
 def create_db_tables():
     """Creates the database tables defined in the metadata if they don't exist."""
     if engine is None or metadata is None:
-        print("Database engine not initialized. Cannot create tables.")
+        log("Database engine not initialized. Cannot create tables.")
         return False
     try:
-        print("Attempting to create database tables if they don't exist...")
+        log("Attempting to create database tables if they don't exist...")
         metadata.create_all(engine)
-        print("Tables checked/created successfully.")
+        log("Tables checked/created successfully.")
         return True
     except SQLAlchemyError as e:
-        print(f"Error creating database tables: {e}")
+        log(f"Error creating database tables: {e}")
         return False
     except Exception as e:
-        print(f"An unexpected error occurred during table creation: {e}")
+        log(f"An unexpected error occurred during table creation: {e}")
         return False
 
 
@@ -58,56 +105,99 @@ def insert_ohlcv_data(df):
     Args:
         df (pd.DataFrame): DataFrame with columns matching the ohlcv_table structure
                            (ticker, date, open, high, low, close, volume).
-                           'date' column should contain date objects or be parsable.
+                           'date' column should be datetime64 (time part is ignored),
+                           or contain date objects / parsable strings.
+
+    Returns:
+        bool: True if the rows were written, False otherwise.
     """
     if engine is None:
-        print("Database engine not initialized. Cannot insert data.")
-        return
+        log("Database engine not initialized. Cannot insert data.")
+        return False
     if df is None or df.empty:
-        print("No data provided for insertion.")
-        return
+        log("No data provided for insertion.")
+        return False
 
     required_cols = {'ticker', 'date', 'open', 'high', 'low', 'close', 'volume'}
     if not required_cols.issubset(df.columns):
         missing = required_cols - set(df.columns)
-        print(f"Error: DataFrame is missing required columns: {missing}")
-        return
-
-    # Prepare data for insertion (list of dictionaries)
-    # Ensure date is date object, handle potential NaNs -> None for SQL
-    df_copy = df.copy()
-    df_copy['date'] = pd.to_datetime(df_copy['date']).dt.date
-    # Replace Pandas NA/NaN with None for database compatibility
-    data_to_insert = df_copy[list(required_cols)].replace({pd.NA: None, np.nan: None}).to_dict(orient='records')
-
-
-    if not data_to_insert:
-        print("Data became empty after processing NAs, nothing to insert.")
-        return
-
-    # Use PostgreSQL's ON CONFLICT DO UPDATE (Upsert)
-    stmt = pg_insert(ohlcv_table).values(data_to_insert)
-    update_dict = {col.name: stmt.excluded[col.name] for col in ohlcv_table.columns if col.name not in ['ticker', 'date']}
-    upsert_stmt = stmt.on_conflict_do_update(
-        index_elements=['ticker', 'date'], # Constraint name or columns
-        set_=update_dict
-    )
+        log(f"Error: DataFrame is missing required columns: {missing}")
+        return False
+
+    # Prepare data for insertion in table column order; NaNs become NULL in the database
+    # datetime64 dates (as produced by clean_ohlcv_data) are written as-is, anything else is parsed once
+    df_insert = df[OHLCV_COLUMNS]
+    if not pd.api.types.is_datetime64_any_dtype(df_insert['date']):
+        df_insert = df_insert.assign(date=pd.to_datetime(df_insert['date']))
 
     try:
-        with engine.connect() as connection:
-            with connection.begin(): # Start transaction
-                connection.execute(upsert_stmt)
-        print(f"Successfully inserted/updated {len(data_to_insert)} rows for tickers: {df['ticker'].unique().tolist()}")
-    except SQLAlchemyError as e:
-        print(f"Database error during data insertion: {e}")
+        try:
+            _copy_upsert(df_insert)
+        except (psycopg2.errors.InsufficientPrivilege, psycopg2.errors.FeatureNotSupported) as e:
+            # COPY/temp tables can be unavailable (e.g. restricted roles, some poolers/proxies);
+            # fall back to batched executemany. Data and connection errors go to the handlers below.
+            log(f"COPY bulk load unavailable ({e}); falling back to executemany upsert.")
+            _executemany_upsert(df_insert)
+        _query_ohlcv.cache_clear() # Memoized reads may now be stale
+        log(f"Successfully inserted/updated {len(df_insert)} rows for tickers: {df['ticker'].unique().tolist()}")
+        return True
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        log(f"Database error during data insertion: {e}")
+        return False
     except Exception as e:
-        print(f"An unexpected error occurred during data insertion: {e}")
+        log(f"An unexpected error occurred during data insertion: {e}")
+        return False
+
+
+def _copy_upsert(df):
+    """Bulk loads df into a temp staging table via COPY, then upserts into ohlcv_data."""
+    csv_buffer = io.StringIO(df.to_csv(index=False, header=False)) # Empty fields load as NULL
+    # Bypass SQLAlchemy and use the pooled psycopg2 connection directly for COPY
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {STAGE_TABLE_NAME} (LIKE {ohlcv_table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.copy_expert(f"COPY {STAGE_TABLE_NAME} ({_COLUMN_LIST}) FROM STDIN WITH CSV", csv_buffer)
+            cursor.execute(
+                f"INSERT INTO {ohlcv_table.name} ({_COLUMN_LIST}) "
+                f"SELECT {_COLUMN_LIST} FROM {STAGE_TABLE_NAME} {_ON_CONFLICT_CLAUSE}"
+            )
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close() # Returns the connection to the pool
+
+
+def _executemany_upsert(df):
+    """
+    Upserts df into ohlcv_data by passing a parameter list to the Core upsert statement.
+
+    The engine's executemany settings let the driver batch the rows into multi-row VALUES.
+    """
+    # Build parameter rows straight from numpy columns; NaN becomes None (NULL) for the database
+    numeric = df[_NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    numeric_cols = np.where(np.isnan(numeric), None, numeric).T.tolist()
+    rows = zip(df['ticker'].tolist(), df['date'].tolist(), *numeric_cols)
+    data_to_insert = [dict(zip(OHLCV_COLUMNS, row)) for row in rows] # Core executemany takes mappings
+
+    with engine.connect() as connection:
+        with connection.begin(): # Start transaction
+            connection.execute(_UPSERT_STMT, data_to_insert)
 
 
 def fetch_ohlcv_data(ticker, start_date=None, end_date=None):
     """
     Fetches OHLCV data for a specific ticker from the database.
 
+    Results are memoized per process for (ticker, start_date, end_date), so repeated calls
+    (e.g. from a notebook) skip the database round-trip. Entries expire after
+    DB_READ_CACHE_TTL_SECONDS, which bounds staleness when another process (such as the Cron
+    writer) inserts rows; inserts made in this process also clear the cache.
+
     Args:
         ticker (str): The ticker symbol to fetch.
         start_date (str or date, optional): Start date (inclusive). Defaults to None (no start limit).
@@ -118,30 +208,81 @@ def fetch_ohlcv_data(ticker, start_date=None, end_date=None):
                       Returns empty DataFrame if no data or error.
     """
     if engine is None:
-        print("Database engine not initialized. Cannot fetch data.")
+        log("Database engine not initialized. Cannot fetch data.")
+        return pd.DataFrame()
+
+    try:
+        # Normalize the bounds so equivalent str/date arguments share a cache entry
+        start_key = pd.to_datetime(start_date).date() if start_date else None
+        end_key = pd.to_datetime(end_date).date() if end_date else None
+        # The time bucket rolls over every TTL, so older entries are never served again
+        ttl_bucket = int(time.time() // DB_READ_CACHE_TTL_SECONDS)
+        df = _query_ohlcv(ticker, start_key, end_key, ttl_bucket)
+        log(f"Fetched {len(df)} rows for ticker {ticker} from database.")
+        return df.copy() # Callers may mutate the result; keep the cached frame intact
+    except SQLAlchemyError as e:
+        log(f"Database error fetching data for {ticker}: {e}")
+        return pd.DataFrame()
+    except Exception as e:
+        log(f"An unexpected error occurred fetching data for {ticker}: {e}")
         return pd.DataFrame()
 
-    stmt = ohlcv_table.select().where(ohlcv_table.c.ticker == ticker)
+
+@functools.lru_cache(maxsize=64)
+def _query_ohlcv(ticker, start_date, end_date, ttl_bucket):
+    """
+    Runs the OHLCV select. Errors propagate so that failed queries are never cached.
+    ttl_bucket only takes part in the cache key.
+    """
+    stmt = select(*_READ_COLUMNS).where(ohlcv_table.c.ticker == ticker)
+
+    if start_date:
+        stmt = stmt.where(ohlcv_table.c.date >= start_date)
+    if end_date:
+        stmt = stmt.where(ohlcv_table.c.date <= end_date)
+
+    stmt = stmt.order_by(ohlcv_table.c.date)
+
+    with engine.connect() as connection:
+        return pd.read_sql(stmt, connection, index_col='date', parse_dates=['date'], dtype=_READ_DTYPES)
+
+
+def fetch_ohlcv_bulk(tickers, start_date=None, end_date=None):
+    """
+    Fetches OHLCV data for several tickers from the database in a single query.
+
+    Args:
+        tickers (list[str]): The ticker symbols to fetch.
+        start_date (str or date, optional): Start date (inclusive). Defaults to None (no start limit).
+        end_date (str or date, optional): End date (inclusive). Defaults to None (no end limit).
+
+    Returns:
+        dict: Mapping of ticker -> DataFrame (date index, sorted by date) for every
+              ticker that has data. Returns an empty dict if no data or error.
+    """
+    if engine is None:
+        log("Database engine not initialized. Cannot fetch data.")
+        return {}
+    if not tickers:
+        return {}
+
+    stmt = select(*_READ_COLUMNS).where(ohlcv_table.c.ticker.in_(list(tickers)))
 
     if start_date:
         stmt = stmt.where(ohlcv_table.c.date >= pd.to_datetime(start_date).date())
     if end_date:
         stmt = stmt.where(ohlcv_table.c.date <= pd.to_datetime(end_date).date())
 
-    stmt = stmt.order_by(ohlcv_table.c.date)
+    stmt = stmt.order_by(ohlcv_table.c.ticker, ohlcv_table.c.date)
 
     try:
         with engine.connect() as connection:
-            df = pd.read_sql(stmt, connection, index_col='date', parse_dates=['date'])
-        # Convert numeric columns back from potentially Decimal types
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        print(f"Fetched {len(df)} rows for ticker {ticker} from database.")
-        return df
+            df = pd.read_sql(stmt, connection, index_col='date', parse_dates=['date'], dtype=_READ_DTYPES)
+        log(f"Fetched {len(df)} rows for {df['ticker'].nunique()} tickers from database.")
+        return dict(tuple(df.groupby('ticker', sort=False)))
     except SQLAlchemyError as e:
-        print(f"Database error fetching data for {ticker}: {e}")
-        return pd.DataFrame()
+        log(f"Database error fetching data for {tickers}: {e}")
+        return {}
     except Exception as e:
-        print(f"An unexpected error occurred fetching data for {ticker}: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        log(f"An unexpected error occurred fetching data for {tickers}: {e}")
+        return {}
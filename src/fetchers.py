@@ -1,10 +1,117 @@
 # src/fetchers.py
 
-import yfinance as yf
 import pandas as pd
 import time
+import os
+import hashlib
+import threading
 from datetime import date, timedelta
 
+from .config import FETCH_CACHE_DIR, FETCH_CACHE_TTL_HOURS
+from .console import log
+
+# In-process layer over the on-disk cache (cache path -> (fetched_at, DataFrame)),
+# so repeated fetches in the same process skip the parquet read as well
+_memory_cache = {}
+_MEMORY_CACHE_SIZE = 64
+_memory_cache_lock = threading.Lock() # Fetchers may run from worker threads
+
+def _remember(path, fetched_at, hist):
+    """Adds an entry to the in-process cache, evicting the oldest one when full."""
+    hist = hist.copy() # Copy outside the lock
+    with _memory_cache_lock:
+        _memory_cache.pop(path, None)
+        if len(_memory_cache) >= _MEMORY_CACHE_SIZE:
+            _memory_cache.pop(next(iter(_memory_cache)), None)
+        _memory_cache[path] = (fetched_at, hist)
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to `capacity` calls and
+    `rate` calls per second on average, shared by every thread that uses it.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait) # Sleep outside the lock so other threads can refill/check
+
+
+# Upper bound on yfinance HTTP requests per second across all threads
+YF_REQUESTS_PER_SECOND = 5
+_yf_rate_limiter = _TokenBucket(rate=YF_REQUESTS_PER_SECOND, capacity=YF_REQUESTS_PER_SECOND)
+
+
+def _cache_path(ticker, start_date, end_date):
+    """Returns the parquet cache file path for a (ticker, start, end) request."""
+    start_key = pd.to_datetime(start_date).date()
+    end_key = pd.to_datetime(end_date).date()
+    key = hashlib.md5(f"{ticker}|{start_key}|{end_key}".encode()).hexdigest()
+    return os.path.join(FETCH_CACHE_DIR, f"{key}.parquet")
+
+
+def _read_cache(ticker, start_date, end_date):
+    """Returns the cached DataFrame for the request if a fresh one exists, else None."""
+    path = _cache_path(ticker, start_date, end_date)
+    ttl_seconds = FETCH_CACHE_TTL_HOURS * 3600
+    with _memory_cache_lock:
+        entry = _memory_cache.get(path)
+    if entry is not None and time.time() - entry[0] < ttl_seconds:
+        return entry[1].copy() # Callers may mutate the result; keep the cached frame intact
+    try:
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl_seconds:
+            hist = pd.read_parquet(path)
+            _remember(path, os.path.getmtime(path), hist)
+            log(f"Loaded {len(hist)} cached rows for {ticker} ({start_date} to {end_date}).")
+            return hist
+    except Exception as e:
+        log(f"Cache read failed for {ticker}: {e}")
+    return None
+
+
+def _write_cache(ticker, start_date, end_date, hist):
+    """Stores a fetched DataFrame in the in-process and on-disk caches. Disk failures are logged and ignored."""
+    path = _cache_path(ticker, start_date, end_date)
+    _remember(path, time.time(), hist)
+    try:
+        os.makedirs(FETCH_CACHE_DIR, exist_ok=True)
+        hist.to_parquet(path)
+    except Exception as e:
+        log(f"Cache write failed for {ticker}: {e}")
+    _prune_cache()
+
+
+def _prune_cache():
+    """Deletes expired parquet files so the cache directory does not grow across daily runs."""
+    cutoff = time.time() - FETCH_CACHE_TTL_HOURS * 3600
+    try:
+        with os.scandir(FETCH_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith('.parquet') and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass # Already removed by a concurrent prune
+    except OSError as e:
+        log(f"Cache prune failed: {e}")
+
+
 def fetch_yfinance_data(ticker, start_date, end_date):
     """
     Fetches daily OHLCV data using yfinance.
@@ -17,10 +124,16 @@ def fetch_yfinance_data(ticker, start_date, end_date):
     Returns:
         pd.DataFrame: DataFrame with OHLCV data and date index, or empty DataFrame on error.
     """
-    print(f"Fetching data for {ticker} from yfinance ({start_date} to {end_date})...")
+    cached = _read_cache(ticker, start_date, end_date)
+    if cached is not None:
+        return cached
+
+    log(f"Fetching data for {ticker} from yfinance ({start_date} to {end_date})...")
+    import yfinance as yf # Imported lazily to keep start-up fast for scripts that never download
     try:
         # yfinance expects end_date to be exclusive for daily data, so add 1 day
         end_date_yf = pd.to_datetime(end_date) + timedelta(days=1)
+        _yf_rate_limiter.acquire() # Be polite: shared request budget across all threads
         stock = yf.Ticker(ticker)
         # Use period or start/end. Use auto_adjust=False to get 'Adj Close' separate if needed,
         # but simpler to use auto_adjust=True and rely on yfinance's adjusted OHLC.
@@ -28,7 +141,7 @@ def fetch_yfinance_data(ticker, start_date, end_date):
         hist = stock.history(start=start_date, end=end_date_yf, interval='1d', auto_adjust=True)
 
         if hist.empty:
-            print(f"No data returned from yfinance for {ticker} for the period.")
+            log(f"No data returned from yfinance for {ticker} for the period.")
             return pd.DataFrame()
 
         # Rename columns to lowercase and match database schema
@@ -41,7 +154,8 @@ def fetch_yfinance_data(ticker, start_date, end_date):
         }, inplace=True)
 
         # Ensure date is the index and remove timezone if present
-        hist.index = pd.to_datetime(hist.index).tz_localize(None).date
+        # Truncate to midnight as a datetime64 DatetimeIndex (no per-row Python date objects)
+        hist.index = pd.to_datetime(hist.index).tz_localize(None).normalize()
         hist.index.name = 'date'
 
         # Select only the required columns
@@ -51,12 +165,98 @@ def fetch_yfinance_data(ticker, start_date, end_date):
         hist = hist[cols_to_select]
 
 
-        print(f"Successfully fetched {len(hist)} rows for {ticker} from yfinance.")
-        # Add a small delay to be polite
-        time.sleep(0.5)
+        log(f"Successfully fetched {len(hist)} rows for {ticker} from yfinance.")
+        _write_cache(ticker, start_date, end_date, hist)
         return hist
 
     except Exception as e:
-        print(f"Error fetching yfinance data for {ticker}: {e}")
+        log(f"Error fetching yfinance data for {ticker}: {e}")
         # Consider more specific error handling (e.g., network errors, ticker not found)
         return pd.DataFrame()
+
+
+# Yahoo's batch endpoint handles roughly this many symbols per request
+YF_BATCH_SIZE = 20
+
+def fetch_yfinance_batch(tickers, start_date, end_date):
+    """
+    Fetches daily OHLCV data for several tickers using batched yfinance downloads.
+
+    Args:
+        tickers (list[str]): Ticker symbols.
+        start_date (str or date): Start date.
+        end_date (str or date): End date.
+
+    Returns:
+        dict: Mapping of ticker -> DataFrame with OHLCV data and date index.
+              Tickers that failed or returned no data map to an empty DataFrame.
+    """
+    results = {ticker: pd.DataFrame() for ticker in tickers}
+
+    # Serve fresh on-disk cache hits first and only download the remaining tickers
+    to_fetch = []
+    for ticker in tickers:
+        cached = _read_cache(ticker, start_date, end_date)
+        if cached is not None:
+            results[ticker] = cached
+        else:
+            to_fetch.append(ticker)
+
+    if not to_fetch:
+        return results
+
+    import yfinance as yf # Imported lazily to keep start-up fast for scripts that never download
+    # yfinance expects end_date to be exclusive for daily data, so add 1 day
+    end_date_yf = pd.to_datetime(end_date) + timedelta(days=1)
+    required_cols = ['open', 'high', 'low', 'close', 'volume']
+
+    # yf.download(threads=True) sends one chart request per symbol, all at once. Downloading in
+    # groups no larger than the bucket capacity, each paid for up front, keeps both the burst
+    # size and the average request rate within YF_REQUESTS_PER_SECOND.
+    group_size = min(YF_BATCH_SIZE, YF_REQUESTS_PER_SECOND)
+    for i in range(0, len(to_fetch), group_size):
+        batch = to_fetch[i:i + group_size]
+        log(f"Fetching data for {batch} from yfinance ({start_date} to {end_date})...")
+        try:
+            for _ in batch: # One token per symbol request
+                _yf_rate_limiter.acquire()
+            raw = yf.download(' '.join(batch), start=start_date, end=end_date_yf, interval='1d',
+                              auto_adjust=True, group_by='ticker', threads=True, progress=False)
+        except Exception as e:
+            log(f"Error fetching yfinance batch data for {batch}: {e}")
+            continue
+
+        if raw is None or raw.empty:
+            log(f"No data returned from yfinance for {batch} for the period.")
+            continue
+
+        for ticker in batch:
+            try:
+                if isinstance(raw.columns, pd.MultiIndex):
+                    if ticker not in raw.columns.get_level_values(0):
+                        log(f"No data returned from yfinance for {ticker} for the period.")
+                        continue
+                    hist = raw[ticker]
+                else:
+                    # Older yfinance versions return flat columns for a single ticker
+                    hist = raw
+                hist = hist.rename(columns=str.lower).dropna(how='all')
+
+                if hist.empty:
+                    log(f"No data returned from yfinance for {ticker} for the period.")
+                    continue
+
+                # Ensure date is the index and remove timezone if present
+                # Truncate to midnight as a datetime64 DatetimeIndex (no per-row Python date objects)
+                hist.index = pd.to_datetime(hist.index).tz_localize(None).normalize()
+                hist.index.name = 'date'
+
+                # Ensure only existing columns are selected in case yfinance changes output
+                cols_to_select = [col for col in required_cols if col in hist.columns]
+                results[ticker] = hist[cols_to_select]
+                log(f"Successfully fetched {len(hist)} rows for {ticker} from yfinance.")
+                _write_cache(ticker, start_date, end_date, results[ticker])
+            except Exception as e:
+                log(f"Error processing yfinance batch data for {ticker}: {e}")
+
+    return results
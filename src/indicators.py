@@ -1,7 +1,31 @@
 # src/indicators.py
 
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError: # numba is optional; fall back to pandas rolling windows
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _sma_nb(values, window):
+        """O(N) running-sum SMA over a contiguous float64 array (no NaNs allowed)."""
+        n = values.size
+        out = np.empty(n)
+        out[:window - 1] = np.nan
+        running_sum = values[:window].sum()
+        out[window - 1] = running_sum / window
+        for i in range(window, n):
+            running_sum += values[i] - values[i - window]
+            out[i] = running_sum / window
+        return out
+else:
+    _sma_nb = None
+
+
 def calculate_sma(data_series, window):
     """
     Calculates the Simple Moving Average (SMA).
@@ -23,7 +47,12 @@ def calculate_sma(data_series, window):
          return pd.Series(index=data_series.index, dtype=float)
 
     try:
-        sma = data_series.rolling(window=window, min_periods=window).mean()
+        values = data_series.to_numpy(dtype=np.float64)
+        # The running-sum kernel cannot skip gaps, so series with NaNs use pandas' windowing instead
+        if _sma_nb is not None and not np.isnan(values).any():
+            sma = pd.Series(_sma_nb(values, window), index=data_series.index, name=data_series.name)
+        else:
+            sma = data_series.rolling(window=window, min_periods=window).mean()
         print(f"Indicator: Calculated SMA with window {window}.")
         return sma
     except Exception as e:
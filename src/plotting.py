@@ -1,12 +1,18 @@
 # src/plotting.py
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import mplfinance as mpf # For better financial plots
+import functools
 import os
 
 from .config import PLOT_OUTPUT_DIR # Import output dir from config
 
+@functools.lru_cache(maxsize=1)
+def _plot_style():
+    """Common financial plot style, built once on first use instead of on every plot call."""
+    import mplfinance as mpf
+    return mpf.make_mpf_style(base_mpf_style='yahoo')
+
+
 def plot_ohlc_with_indicator(df, ticker, indicator_name, indicator_series, filename_suffix="plot"):
     """
     Generates and saves an OHLC/Candlestick plot with an overlaid indicator.
@@ -38,23 +44,26 @@ def plot_ohlc_with_indicator(df, ticker, indicator_name, indicator_series, filen
 
     print(f"Plotting: Generating plot for {ticker} with {indicator_name}...")
 
-    # Ensure indicator series is aligned and part of the dataframe for mplfinance
-    plot_df = df.copy()
-    plot_df[indicator_name] = indicator_series
+    # Imported lazily: matplotlib/mplfinance add noticeable start-up time to scripts that never plot
+    import mplfinance as mpf # For better financial plots
+
+    # Build the plot frame from the OHLCV columns only, downcast to float32 (renders identically).
+    # The cast already produces a new half-size frame, so no separate full-frame copy is needed.
+    plot_df = df[['open', 'high', 'low', 'close', 'volume']].astype('float32')
+    plot_df[indicator_name] = indicator_series.astype('float32') # Aligned on df's index
 
     # Create the plot using mplfinance
     # Additional plot arguments (apdict) to plot the indicator on the main panel
     ap = [mpf.make_addplot(plot_df[indicator_name], panel=0, color='blue', alpha=0.7)] # panel 0 is the main price panel
 
-    # Define plot style and save path
-    style = 'yahoo' # Common financial plot style
+    # Define save path (style is built once on first use)
     save_path = os.path.join(PLOT_OUTPUT_DIR, f"{ticker}_{indicator_name}_{filename_suffix}.png")
 
     try:
         mpf.plot(
             plot_df,
             type='candle', # 'ohlc' or 'candle'
-            style=style,
+            style=_plot_style(),
             title=f"{ticker} OHLCV with {indicator_name}",
             ylabel='Price',
             ylabel_lower='Volume',